@@ -3,12 +3,16 @@ Clinical NLP Narration System
 An advanced Clinical Natural Language Processing and Pharmacovigilance Analysis Model
 """
 
+import io
 import re
 from dataclasses import dataclass
 from typing import List, Dict, Tuple
 from datetime import datetime
 from enum import Enum
 
+# Report separator, built once instead of per format_output call
+SEPARATOR = "=" * 80 + "\n"
+
 
 class SeverityLevel(Enum):
     MILD = "Mild"
@@ -491,20 +495,23 @@ class ClinicalNLPNarrator:
     
     def format_output(self, analysis: Dict[str, str]) -> str:
         """Format the analysis output for display"""
-        output_lines = []
-        output_lines.append("=" * 80)
-        output_lines.append("CLINICAL NLP PHARMACOVIGILANCE ANALYSIS REPORT")
-        output_lines.append("=" * 80)
-        output_lines.append("")
-        
+        # StringIO accumulates the report in one growable buffer instead
+        # of a list of small strings joined at the end
+        buf = io.StringIO()
+        buf.write(SEPARATOR)
+        buf.write("CLINICAL NLP PHARMACOVIGILANCE ANALYSIS REPORT\n")
+        buf.write(SEPARATOR)
+
         for section, content in analysis.items():
-            output_lines.append(f"{'=' * 80}")
-            output_lines.append(f"{section.upper()}")
-            output_lines.append(f"{'=' * 80}")
-            output_lines.append(content)
-            output_lines.append("")
-        
-        return "\n".join(output_lines)
+            buf.write("\n")
+            buf.write(SEPARATOR)
+            buf.write(section.upper())
+            buf.write("\n")
+            buf.write(SEPARATOR)
+            buf.write(content)
+            buf.write("\n")
+
+        return buf.getvalue()
 
 
 def main():
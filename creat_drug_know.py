@@ -1,7 +1,10 @@
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 output_dir = "drug_knowledge"
-os.makedirs(output_dir, exist_ok=True)
+# Precomputed path prefix; drug names are simple ASCII so plain string
+# concatenation is enough and skips os.path.join per file
+_path_prefix = os.fspath(output_dir) + os.sep
 drug_knowledge = {
     'metformin': {
                 'class': 'Biguanide',
@@ -109,46 +112,110 @@ drug_knowledge = {
             }
         }
 
-def create_drug_documents(drug_knowledge):
-    for drug, details in drug_knowledge.items():
-        filename = os.path.join(output_dir, f"{drug}.md")
-        
-        with open(filename, "w", encoding="utf-8") as f:
-            f.write(f"DRUG NAME: {drug.title()}\n")
-            f.write(f"DRUG CLASS: {details.get('class', 'Unknown')}\n\n")
-            
-            f.write("MECHANISM OF ACTION:\n")
-            for k, v in details.get('mechanism', {}).items():
-                f.write(f"- {k.replace('_',' ').title()}: {v}\n")
-            f.write("\n")
-            
-            f.write("COMMON ADVERSE EFFECTS:\n")
-            for se in details.get('common_side_effects', []):
-                f.write(f"- {se}\n")
-            f.write("\n")
-            
-            f.write("SERIOUS ADVERSE EFFECTS:\n")
-            for risk in details.get('serious_risks', []):
-                f.write(f"- {risk}\n")
-            f.write("\n")
-            
-            f.write("RISK FACTORS:\n")
-            for rf in details.get('risk_factors', []):
-                f.write(f"- {rf}\n")
-            f.write("\n")
-            
-            if 'contraindications' in details:
-                f.write("CONTRAINDICATIONS:\n")
-                for c in details['contraindications']:
-                    f.write(f"- {c}\n")
-                f.write("\n")
-            
-            if 'monitoring' in details:
-                f.write("MONITORING:\n")
-                for m in details['monitoring']:
-                    f.write(f"- {m}\n")
-                f.write("\n")
-        
-        print(f"Created: {filename}")
+def _bullet_block(header, items):
+    """Render a section header plus '- item' lines in one join"""
+    if not items:
+        return f"{header}:\n\n"
+    return f"{header}:\n- " + "\n- ".join(items) + "\n\n"
+
+
+def _render_drug_document(drug, details):
+    """Render one drug's knowledge as markdown text"""
+    mech_lines = "\n".join(
+        f"- {k.replace('_',' ').title()}: {v}"
+        for k, v in details.get('mechanism', {}).items()
+    )
+
+    parts = [
+        f"DRUG NAME: {drug.title()}\n",
+        f"DRUG CLASS: {details.get('class', 'Unknown')}\n\n",
+        f"MECHANISM OF ACTION:\n{mech_lines}\n\n" if mech_lines else "MECHANISM OF ACTION:\n\n",
+        _bullet_block("COMMON ADVERSE EFFECTS", details.get('common_side_effects', [])),
+        _bullet_block("SERIOUS ADVERSE EFFECTS", details.get('serious_risks', [])),
+        _bullet_block("RISK FACTORS", details.get('risk_factors', [])),
+    ]
+
+    if 'contraindications' in details:
+        parts.append(_bullet_block("CONTRAINDICATIONS", details['contraindications']))
+
+    if 'monitoring' in details:
+        parts.append(_bullet_block("MONITORING", details['monitoring']))
+
+    return "".join(parts)
+
+
+def create_drug_archive(drug_knowledge, path=os.path.join(output_dir, "all.md")):
+    """Write the whole knowledge base into one archive file.
+
+    Preferred over create_drug_documents when downstream readers can index
+    the combined file: one open/close and one metadata update instead of
+    one per drug, which matters on networked filesystems.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "wb", buffering=1 << 20) as f:
+        for drug, details in drug_knowledge.items():
+            f.write(f"---\n{drug}\n---\n".encode("utf-8"))
+            f.write(_render_drug_document(drug, details).encode("utf-8"))
+    print(f"Created archive: {path}")
+
+
+# O_CLOEXEC is Linux/POSIX; fall back to 0 where unavailable
+_OPEN_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_CLOEXEC", 0)
+
+
+def _write_drug_document(item, keep_fd=False):
+    """Write a single drug markdown file (worker for the thread pool).
+
+    When keep_fd is True the open fd is returned instead of closed, so the
+    caller can batch fsync/close at the end of the run.
+    """
+    drug, details = item
+    filename = f"{_path_prefix}{drug}.md"
+    body = _render_drug_document(drug, details).encode("utf-8")
+
+    # Raw fd write: these files are tiny, so the TextIOWrapper/BufferedWriter
+    # layers cost more than the bytes themselves
+    fd = os.open(os.fsencode(filename), _OPEN_FLAGS, 0o644)
+    try:
+        os.write(fd, body)
+    except Exception:
+        os.close(fd)
+        raise
+
+    print(f"Created: {filename}")
+
+    if keep_fd:
+        return fd
+    os.close(fd)
+    return None
+
+
+def create_drug_documents(drug_knowledge, durable=False):
+    """Write one markdown file per drug.
+
+    With durable=True, fsync is batched after all writes complete (one
+    flush pass instead of a disk round-trip per file), and the directory
+    itself is fsynced so the new entries survive a crash.
+    """
+    # Directory must exist before the pool starts writing into it
+    os.makedirs(output_dir, exist_ok=True)
+
+    # File writes are independent, so overlap the open/write/close latency
+    # across drugs (the GIL is released during OS write calls)
+    with ThreadPoolExecutor(max_workers=min(32, len(drug_knowledge))) as executor:
+        fds = list(executor.map(
+            lambda item: _write_drug_document(item, keep_fd=durable),
+            drug_knowledge.items()
+        ))
+
+    if durable:
+        for fd in fds:
+            os.fsync(fd)
+            os.close(fd)
+        dir_fd = os.open(output_dir, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
 
 create_drug_documents(drug_knowledge)
@@ -4,12 +4,70 @@ Performs semantic search across drug and syndrome knowledge base
 """
 
 import os
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from pathlib import Path
 from typing import List, Dict, Tuple
 from dataclasses import dataclass
+import numpy as np
+from bson.binary import Binary, BinaryVectorDtype
 from pymongo import MongoClient
 from fastembed import TextEmbedding
 
 
+def _to_query_vector(embedding) -> Binary:
+    """Pack an embedding as a float32 BSON vector (binary subtype 9)
+
+    4 bytes per dimension on the wire instead of an 8-byte BSON double
+    per element, and the encoder copies one buffer rather than walking
+    384 Python floats.
+    """
+    return Binary.from_vector(
+        np.asarray(embedding, dtype=np.float32), BinaryVectorDtype.FLOAT32
+    )
+
+# Shared FastEmbed model cache (see quantize_embedding_model)
+EMBEDDING_CACHE_DIR = os.path.expanduser("~/.cache/care2data/fastembed")
+
+# Query-term buckets as bisect tables; centralizing the boundaries here
+# also keeps the query-embedding cache keys stable. Age is right-biased
+# (65 is elderly), duration left-biased (7 days is still short-term).
+_AGE_BOUNDS = (65,)
+_AGE_TERMS = ("adult", "elderly")
+_DAY_BOUNDS = (7, 30)
+_DURATION_TERMS = ("short-term", "acute", "chronic prolonged")
+
+
+def quantize_embedding_model(cache_dir: str = EMBEDDING_CACHE_DIR) -> int:
+    """
+    One-time INT8 quantization of the cached MiniLM weights
+
+    Run at install time, after the first TextEmbedding download. Each
+    cached model.onnx is rewritten with dynamically quantized INT8
+    weights (the FP32 original is kept as model_fp32.onnx), so every
+    later TextEmbedding load picks up the quantized graph under the
+    expected filename. INT8 matmul through oneDNN/AVX-VNNI gives
+    roughly 2-4x the throughput of FP32 at ~1% cosine-similarity loss.
+    Stored document embeddings stay FP32 — only the query-side forward
+    pass changes, so the Atlas index stays compatible.
+
+    Returns:
+        Number of models quantized
+    """
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    converted = 0
+    for model_path in Path(cache_dir).rglob("model.onnx"):
+        backup = model_path.with_name("model_fp32.onnx")
+        if backup.exists():
+            # Already quantized on a previous run
+            continue
+        model_path.rename(backup)
+        quantize_dynamic(str(backup), str(model_path), weight_type=QuantType.QInt8)
+        converted += 1
+    return converted
+
+
 @dataclass
 class RetrievedChunk:
     """Represents a retrieved knowledge chunk"""
@@ -24,7 +82,10 @@ class ClinicalRAGRetriever:
     """
     Retrieval-Augmented Generation engine for clinical knowledge
     """
-    
+
+    QUERY_CACHE_MAX = 1024
+
+
     def __init__(
         self,
         mongo_uri: str,
@@ -39,26 +100,79 @@ class ClinicalRAGRetriever:
             db_name: Database name
             collection_name: Collection name
         """
-        self.embedding_model = TextEmbedding(model_name="sentence-transformers/all-MiniLM-L6-v2")
+        # Persistent cache_dir keeps the downloaded/optimized ONNX model
+        # across process restarts, pin the CPU provider explicitly, and
+        # size the intra-op thread pool to physical cores (hyperthread
+        # oversubscription hurts GEMM throughput)
+        self.embedding_model = TextEmbedding(
+            model_name="sentence-transformers/all-MiniLM-L6-v2",
+            cache_dir=EMBEDDING_CACHE_DIR,
+            providers=["CPUExecutionProvider"],
+            threads=max(1, (os.cpu_count() or 2) // 2)
+        )
         self.model_name = "all-MiniLM-L6-v2"
-        
-        # MongoDB connection
-        self.mongo_client = MongoClient(mongo_uri)
+
+        # MongoDB connection, tuned for vector-search payloads: zstd
+        # compression shrinks the multi-KB chunk_text responses on the
+        # wire, a small pool covers the retriever's concurrency, and
+        # nearest reads plus a short selection timeout keep latency down
+        self.mongo_client = MongoClient(
+            mongo_uri,
+            compressors="zstd",
+            maxPoolSize=4,
+            serverSelectionTimeoutMS=2000,
+            retryReads=True,
+            readPreference="nearest"
+        )
         self.db = self.mongo_client[db_name]
         self.collection = self.db[collection_name]
-    
+
+        # Memoize query embeddings: build_semantic_query bucketizes age and
+        # duration, so repeated/retried cases collapse to identical query
+        # strings and skip the MiniLM forward pass entirely
+        self._query_embedding_cache = OrderedDict()
+
+    def _embed_queries(self, queries: List[str]) -> List[tuple]:
+        """Embed queries in one FastEmbed batch, serving repeats from the LRU
+
+        Cache misses are collected and sent through a single
+        embedding_model.embed() call, so the model runs one batched
+        forward pass instead of one per query.
+        """
+        cache = self._query_embedding_cache
+        results = [None] * len(queries)
+        misses = []
+
+        for i, query in enumerate(queries):
+            cached = cache.get(query)
+            if cached is not None:
+                cache.move_to_end(query)
+                results[i] = cached
+            else:
+                misses.append(i)
+
+        if misses:
+            embeddings = self.embedding_model.embed([queries[i] for i in misses])
+            for i, embedding in zip(misses, embeddings):
+                vector = tuple(embedding.tolist())
+                cache[queries[i]] = vector
+                if len(cache) > self.QUERY_CACHE_MAX:
+                    cache.popitem(last=False)
+                results[i] = vector
+
+        return results
+
     def create_query_embedding(self, query: str) -> List[float]:
         """
         Create embedding for query text using FastEmbed
-        
+
         Args:
             query: Query string
-            
+
         Returns:
             Embedding vector
         """
-        embedding = list(self.embedding_model.embed([query]))[0]
-        return embedding.tolist()
+        return list(self._embed_queries([" ".join(query.split())])[0])
     
     def build_semantic_query(
         self,
@@ -67,37 +181,35 @@ class ClinicalRAGRetriever:
         age: int,
         days: int,
         gender: str = ""
-    ) -> str:
+    ) -> Tuple[str, str]:
         """
-        Construct optimized semantic query for vector search
-        
+        Construct optimized semantic queries for vector search
+
         Args:
             drug_name: Drug name
             stop_reason: Symptom/reason for stopping
             age: Patient age
             days: Duration in days
             gender: Patient gender
-            
+
         Returns:
-            Semantic query string
+            Tuple of (drug query, syndrome query), each biased toward
+            its branch of the knowledge base
         """
-        # Age risk modifier
-        age_risk = "elderly" if age >= 65 else "adult"
-        
-        # Duration modifier
-        if days <= 7:
-            duration = "short-term"
-        elif days <= 30:
-            duration = "acute"
-        else:
-            duration = "chronic prolonged"
-        
-        # Build comprehensive query
-        query = f"""{drug_name} {stop_reason} adverse effect mechanism toxicity 
-        {age_risk} age risk {duration} duration pathophysiology 
-        clinical manifestation syndrome complication serious"""
-        
-        return " ".join(query.split())  # Clean whitespace
+        # Bucket age and duration through the module-level bisect tables
+        age_risk = _AGE_TERMS[bisect_right(_AGE_BOUNDS, age)]
+        duration = _DURATION_TERMS[bisect_left(_DAY_BOUNDS, days)]
+
+        # Build a targeted query per branch; both are embedded in one
+        # batched model call by retrieve_for_case
+        drug_query = f"""{drug_name} {stop_reason} adverse effect mechanism
+        toxicity {age_risk} age risk {duration} duration"""
+
+        syndrome_query = f"""{stop_reason} syndrome pathophysiology
+        clinical manifestation complication serious
+        {age_risk} age risk {duration} duration"""
+
+        return " ".join(drug_query.split()), " ".join(syndrome_query.split())
     
     def vector_search(
         self,
@@ -116,40 +228,58 @@ class ClinicalRAGRetriever:
         Returns:
             List of retrieved chunks
         """
-        # Build aggregation pipeline
-        pipeline = [
-            {
-                "$vectorSearch": {
-                    "index": "vector_index",
-                    "path": "embedding",
-                    "queryVector": query_embedding,
-                    "numCandidates": top_k * 10,
-                    "limit": top_k
-                }
-            },
-            {
-                "$project": {
-                    "_id": 0,
-                    "document_type": 1,
-                    "name": 1,
-                    "section": 1,
-                    "chunk_text": 1,
-                    "score": {"$meta": "vectorSearchScore"}
-                }
-            }
-        ]
-        
-        # Add filter if specified
-        if document_type:
-            pipeline.insert(1, {
-                "$match": {"document_type": document_type}
-            })
-        
-        # Execute search
+        pipeline = self._search_stages(query_embedding, document_type, top_k)
         results = list(self.collection.aggregate(pipeline))
-        
-        # Convert to dataclass
-        chunks = [
+        return self._to_chunks(results)
+
+    def _search_stages(
+        self,
+        query_embedding: List[float],
+        document_type: str,
+        top_k: int,
+        branch: str = None
+    ) -> List[Dict]:
+        """Build the aggregation stages for one $vectorSearch branch
+
+        When branch is given, each result is tagged with it so callers
+        can split the output of a combined $unionWith aggregation.
+        """
+        vector_search = {
+            "index": "vector_index",
+            "path": "embedding",
+            "queryVector": _to_query_vector(query_embedding),
+            "numCandidates": top_k * 10,
+            "limit": top_k
+        }
+
+        # Pre-filter inside the ANN stage rather than a post-$match: the
+        # index only scores candidates of the right document_type instead
+        # of fetching numCandidates vectors and discarding half. Requires
+        # document_type declared as a "filter" field in vector_index
+        # (vector_ingestion.create_vector_index already emits that).
+        if document_type:
+            vector_search["filter"] = {"document_type": {"$eq": document_type}}
+
+        stages = [{"$vectorSearch": vector_search}]
+
+        projection = {
+            "_id": 0,
+            "document_type": 1,
+            "name": 1,
+            "section": 1,
+            "chunk_text": 1,
+            "score": {"$meta": "vectorSearchScore"}
+        }
+        if branch:
+            projection["branch"] = {"$literal": branch}
+        stages.append({"$project": projection})
+
+        return stages
+
+    @staticmethod
+    def _to_chunks(results: List[Dict]) -> List[RetrievedChunk]:
+        """Convert raw aggregation documents to RetrievedChunk records"""
+        return [
             RetrievedChunk(
                 document_type=r['document_type'],
                 name=r['name'],
@@ -159,8 +289,47 @@ class ClinicalRAGRetriever:
             )
             for r in results
         ]
-        
-        return chunks
+
+    def vector_search_union(
+        self,
+        drug_embedding: List[float],
+        syndrome_embedding: List[float],
+        drug_k: int = 5,
+        syndrome_k: int = 5
+    ) -> Tuple[List[RetrievedChunk], List[RetrievedChunk]]:
+        """
+        Run the drug and syndrome searches in a single aggregation
+
+        $unionWith folds the syndrome branch into the drug branch's
+        pipeline, so one round-trip to Atlas replaces two sequential
+        ones.
+
+        Args:
+            drug_embedding: Query vector for the drug branch
+            syndrome_embedding: Query vector for the syndrome branch
+            drug_k: Number of drug results
+            syndrome_k: Number of syndrome results
+
+        Returns:
+            Tuple of (drug chunks, syndrome chunks)
+        """
+        pipeline = self._search_stages(
+            drug_embedding, "drug", drug_k, branch="drug"
+        )
+        pipeline.append({
+            "$unionWith": {
+                "coll": self.collection.name,
+                "pipeline": self._search_stages(
+                    syndrome_embedding, "syndrome", syndrome_k, branch="syndrome"
+                )
+            }
+        })
+
+        results = list(self.collection.aggregate(pipeline))
+
+        drug_results = self._to_chunks([r for r in results if r.get('branch') == 'drug'])
+        syndrome_results = self._to_chunks([r for r in results if r.get('branch') == 'syndrome'])
+        return drug_results, syndrome_results
     
     def retrieve_for_case(
         self,
@@ -189,32 +358,53 @@ class ClinicalRAGRetriever:
         Returns:
             Dictionary with retrieved context
         """
+        # Build one semantic query per branch
+        drug_query, syndrome_query = self.build_semantic_query(
+            drug_name, stop_reason, age, days, gender
+        )
+
+        # Embed both queries in a single batched model call
+        drug_embedding, syndrome_embedding = self._embed_queries(
+            [drug_query, syndrome_query]
+        )
+
+        return self._compile_case_context(
+            patient_id, drug_name, stop_reason, age, days, gender,
+            drug_query, syndrome_query,
+            drug_embedding, syndrome_embedding,
+            drug_chunks, syndrome_chunks
+        )
+
+    def _compile_case_context(
+        self,
+        patient_id: str,
+        drug_name: str,
+        stop_reason: str,
+        age: int,
+        days: int,
+        gender: str,
+        drug_query: str,
+        syndrome_query: str,
+        drug_embedding,
+        syndrome_embedding,
+        drug_chunks: int,
+        syndrome_chunks: int
+    ) -> Dict:
+        """Run the combined search for one case and build its context"""
         print(f"\n🔍 Retrieving knowledge for Patient {patient_id}")
         print(f"   Drug: {drug_name}")
         print(f"   Stop Reason: {stop_reason}")
         print(f"   Age: {age}, Duration: {days} days\n")
-        
-        # Build semantic query
-        query = self.build_semantic_query(drug_name, stop_reason, age, days, gender)
-        print(f"📝 Semantic Query: {query}\n")
-        
-        # Create query embedding
-        query_embedding = self.create_query_embedding(query)
-        
-        # Retrieve drug knowledge
-        print(f"🔬 Retrieving top {drug_chunks} drug chunks...")
-        drug_results = self.vector_search(
-            query_embedding,
-            document_type="drug",
-            top_k=drug_chunks
-        )
-        
-        # Retrieve syndrome knowledge
-        print(f"🧬 Retrieving top {syndrome_chunks} syndrome chunks...")
-        syndrome_results = self.vector_search(
-            query_embedding,
-            document_type="syndrome",
-            top_k=syndrome_chunks
+        print(f"📝 Drug Query: {drug_query}")
+        print(f"📝 Syndrome Query: {syndrome_query}\n")
+
+        # Retrieve both branches in one aggregation round-trip
+        print(f"🔬 Retrieving top {drug_chunks} drug and top {syndrome_chunks} syndrome chunks...")
+        drug_results, syndrome_results = self.vector_search_union(
+            drug_embedding,
+            syndrome_embedding,
+            drug_k=drug_chunks,
+            syndrome_k=syndrome_chunks
         )
         
         # Display results
@@ -234,7 +424,8 @@ class ClinicalRAGRetriever:
             "age": age,
             "days": days,
             "gender": gender,
-            "query": query,
+            "drug_query": drug_query,
+            "syndrome_query": syndrome_query,
             "drug_context": [
                 {
                     "name": c.name,
@@ -257,6 +448,52 @@ class ClinicalRAGRetriever:
         
         return context
     
+    def retrieve_for_cases(
+        self,
+        cases: List[Dict],
+        drug_chunks: int = 5,
+        syndrome_chunks: int = 5
+    ) -> List[Dict]:
+        """
+        Retrieve knowledge for a batch of clinical cases
+
+        All cases' drug and syndrome queries are built up front and
+        embedded through a single FastEmbed batch — one model forward
+        for 2N queries instead of N — then each case runs its combined
+        $unionWith aggregation.
+
+        Args:
+            cases: Dicts with retrieve_for_case's keyword arguments
+                   (patient_id, drug_name, stop_reason, age, days,
+                   and optionally gender)
+            drug_chunks: Number of drug chunks per case
+            syndrome_chunks: Number of syndrome chunks per case
+
+        Returns:
+            List of context dictionaries, in input order
+        """
+        queries = []
+        for case in cases:
+            drug_query, syndrome_query = self.build_semantic_query(
+                case['drug_name'], case['stop_reason'],
+                case['age'], case['days'], case.get('gender', '')
+            )
+            queries.append(drug_query)
+            queries.append(syndrome_query)
+
+        embeddings = self._embed_queries(queries)
+
+        contexts = []
+        for i, case in enumerate(cases):
+            contexts.append(self._compile_case_context(
+                case['patient_id'], case['drug_name'], case['stop_reason'],
+                case['age'], case['days'], case.get('gender', ''),
+                queries[2 * i], queries[2 * i + 1],
+                embeddings[2 * i], embeddings[2 * i + 1],
+                drug_chunks, syndrome_chunks
+            ))
+        return contexts
+
     def format_context_for_llm(self, context: Dict) -> str:
         """
         Format retrieved context into a prompt for LLM
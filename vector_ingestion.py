@@ -3,14 +3,166 @@ MongoDB Atlas Vector Ingestion Pipeline
 Chunks drug and syndrome knowledge files and creates vector embeddings
 """
 
+import hashlib
+import mmap
 import os
 import re
+import shelve
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+from functools import partial
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional
 from dataclasses import dataclass
-from pymongo import MongoClient
+import numpy as np
+from bson.binary import Binary, BinaryVectorDtype
+from pymongo import InsertOne, MongoClient
+from pymongo.operations import SearchIndexModel
 from fastembed import TextEmbedding
-import tiktoken
+
+# On-disk embedding cache shared across ingestion runs
+EMBED_CACHE_PATH = os.path.expanduser("~/.cache/care2data/embeddings")
+
+# Section headers to keep, hoisted to module scope so process-pool
+# workers and every vectorizer instance share the same frozensets
+DRUG_SECTIONS = frozenset([
+    "MECHANISM OF ACTION",
+    "COMMON ADVERSE EFFECTS",
+    "SERIOUS ADVERSE EFFECTS",
+    "RISK FACTORS",
+    "CONTRAINDICATIONS",
+    "MONITORING",
+    "DRUG INTERACTIONS"
+])
+
+SYNDROME_SECTIONS = frozenset([
+    "KEY SYMPTOMS",
+    "PATHOPHYSIOLOGY",
+    "RISK FACTORS",
+    "DIAGNOSTIC MARKERS",
+    "CLINICAL ACTION",
+    "COMPLICATIONS",
+    "SEVERITY"
+])
+
+# Bytes-level patterns so the linear scan can run directly over an
+# mmap'd file; only matched slices are ever decoded to str
+_SECTION_RE = re.compile(rb'^([A-Z][A-Z ]{2,}):\s*$', re.MULTILINE)
+_NAME_RE = re.compile(rb'(DRUG NAME|SYNDROME):\s*(.+)')
+
+# Chunk sizing in characters at the ~4 chars/token heuristic: split
+# anything over ~256 tokens into ~200-token pieces with ~20 tokens of
+# overlap, and fold sub-100-token remainders into their neighbor.
+# MiniLM truncates at 512 tokens, so right-sized pieces replace
+# silently-truncated oversize embeddings.
+_SPLIT_CHARS = 256 * 4
+_TARGET_CHARS = 200 * 4
+_OVERLAP_CHARS = 20 * 4
+_MIN_CHARS = 100 * 4
+
+_SENTENCE_RE = re.compile(r'(?<=[.!?])\s+')
+
+
+def _split_long_section(text: str) -> List[str]:
+    """Recursively split text on paragraph, then sentence, then
+    whitespace boundaries into roughly _TARGET_CHARS pieces with a
+    small tail overlap between consecutive pieces"""
+    if len(text) <= _SPLIT_CHARS:
+        return [text]
+
+    parts = [p for p in text.split('\n\n') if p.strip()]
+    if len(parts) == 1:
+        parts = _SENTENCE_RE.split(text)
+    if len(parts) == 1:
+        parts = text.split()
+
+    # A single indivisible part longer than the target is recursed at
+    # the next separator level
+    expanded = []
+    for part in parts:
+        if len(part) > _SPLIT_CHARS and part != text:
+            expanded.extend(_split_long_section(part))
+        else:
+            expanded.append(part)
+
+    pieces = []
+    current = ""
+    for part in expanded:
+        if current and len(current) + 1 + len(part) > _TARGET_CHARS:
+            pieces.append(current)
+            # Seed the next piece with the whole-word tail of this one
+            tail = current[-_OVERLAP_CHARS:]
+            cut = tail.find(' ')
+            current = (tail[cut + 1:] + ' ' + part) if cut != -1 else part
+        else:
+            current = f"{current} {part}" if current else part
+
+    if current:
+        # Fold a small remainder into the previous piece
+        if pieces and len(current) < _MIN_CHARS:
+            pieces[-1] = f"{pieces[-1]} {current}"
+        else:
+            pieces.append(current)
+
+    return pieces
+
+
+def _chunk_markdown_file(file_path: str, document_type: str,
+                         sections: frozenset) -> List[Dict]:
+    """Chunk one markdown file (module-level so process-pool workers
+    can pickle it; see MedicalKnowledgeVectorizer.chunk_markdown_file)"""
+    # mmap instead of read(): pages load on demand from the page cache
+    # and no full str copy is materialized until a slice is extracted
+    with open(file_path, 'rb') as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty file cannot be mapped and has nothing to chunk
+            return []
+
+    file_name = Path(file_path).name
+
+    with mm:
+        # Extract document name
+        name_match = _NAME_RE.search(mm)
+        if name_match:
+            doc_name = name_match.group(2).strip().decode('utf-8')
+        else:
+            doc_name = Path(file_path).stem
+
+        chunks = []
+
+        # Shared per-file prefix, built once instead of per chunk
+        doc_prefix = f"Document: {doc_name}\n"
+
+        # Extract sections in one linear scan: locate every header,
+        # then slice the body between consecutive headers
+        matches = list(_SECTION_RE.finditer(mm))
+        for i, match in enumerate(matches):
+            # Interned: the same header names recur across every file,
+            # so all chunks share one str object per section
+            section = sys.intern(match.group(1).decode('ascii'))
+            if section not in sections:
+                continue
+
+            body_end = matches[i + 1].start() if i + 1 < len(matches) else len(mm)
+            section_text = mm[match.end():body_end].decode('utf-8').strip()
+
+            # Oversize sections are split into embedder-sized pieces;
+            # short ones pass through as a single chunk
+            for body in _split_long_section(section_text):
+                # Create chunk with context
+                chunk_text = f"{doc_prefix}Section: {section}\n\n{body}"
+
+                chunks.append({
+                    "section": section,
+                    "text": chunk_text,
+                    "name": doc_name,
+                    "file_name": file_name
+                })
+
+    return chunks
 
 
 @dataclass
@@ -28,22 +180,64 @@ class MedicalKnowledgeVectorizer:
     """
     Chunks medical knowledge and creates vector embeddings for MongoDB Atlas using FastEmbed
     """
-    
+
+    # Documents per bulk_write flush; bounds peak memory and lets the
+    # server parallelize unordered inserts
+    BULK_BATCH = 1000
+
+
     def __init__(
-        self, 
+        self,
         mongo_uri: str,
         db_name: str = "clinical_rag",
-        collection_name: str = "medical_knowledge"
+        collection_name: str = "medical_knowledge",
+        use_gpu: bool = False,
+        cuda_device_id: int = 0,
+        int8_embeddings: bool = False,
+        threads: Optional[int] = None
     ):
         """
         Initialize vectorizer with FastEmbed and MongoDB credentials
-        
+
         Args:
             mongo_uri: MongoDB Atlas connection string
             db_name: Database name
             collection_name: Collection name
+            use_gpu: Run the embedding model on the ONNX CUDA provider
+                     (requires the fastembed-gpu package)
+            cuda_device_id: CUDA device to use when use_gpu is set
+            int8_embeddings: Store scalar-quantized int8 vectors instead
+                             of float32 (8x smaller than the old list
+                             storage; negligible recall loss at d=384)
+            threads: ONNX Runtime intra-op threads for the embedding
+                     session. Defaults to min(8, cpu count): MiniLM
+                     throughput plateaus past ~8 threads, and a lower
+                     cap avoids oversubscription alongside the
+                     process-pool chunking pass.
         """
-        self.embedding_model = TextEmbedding(model_name="sentence-transformers/all-MiniLM-L6-v2")
+        self.int8_embeddings = int8_embeddings
+        if threads is None:
+            threads = min(8, os.cpu_count() or 1)
+        model_name = "sentence-transformers/all-MiniLM-L6-v2"
+        if use_gpu:
+            # Ingestion is compute-bound on the transformer forward pass;
+            # the CUDA execution provider turns the batched embed into
+            # GPU matmuls. Fall back to CPU if the provider is missing.
+            try:
+                self.embedding_model = TextEmbedding(
+                    model_name=model_name,
+                    providers=["CUDAExecutionProvider"],
+                    device_ids=[cuda_device_id]
+                )
+            except Exception as e:
+                print(f"⚠️  CUDA provider unavailable ({e}), falling back to CPU")
+                self.embedding_model = TextEmbedding(
+                    model_name=model_name, threads=threads
+                )
+        else:
+            self.embedding_model = TextEmbedding(
+                model_name=model_name, threads=threads
+            )
         self.model_name = "all-MiniLM-L6-v2"
         
         # MongoDB setup
@@ -51,179 +245,302 @@ class MedicalKnowledgeVectorizer:
         self.db = self.mongo_client[db_name]
         self.collection = self.db[collection_name]
         
-        # Tokenizer for chunking
-        self.tokenizer = tiktoken.get_encoding("cl100k_base")
+        # Content-addressed embedding cache: repeated chunk texts skip
+        # the forward pass (backed on disk across runs, see EMBED_CACHE_PATH)
+        self._embedding_cache = {}
         
-        # Section headers to detect
-        self.drug_sections = [
-            "MECHANISM OF ACTION",
-            "COMMON ADVERSE EFFECTS",
-            "SERIOUS ADVERSE EFFECTS",
-            "RISK FACTORS",
-            "CONTRAINDICATIONS",
-            "MONITORING",
-            "DRUG INTERACTIONS"
-        ]
-        
-        self.syndrome_sections = [
-            "KEY SYMPTOMS",
-            "PATHOPHYSIOLOGY",
-            "RISK FACTORS",
-            "DIAGNOSTIC MARKERS",
-            "CLINICAL ACTION",
-            "COMPLICATIONS",
-            "SEVERITY"
-        ]
+        # Section headers to keep (module-level frozensets; kept as
+        # attributes for callers that customize them per instance)
+        self.drug_sections = DRUG_SECTIONS
+        self.syndrome_sections = SYNDROME_SECTIONS
     
+    @staticmethod
+    def _quantize_int8(vector: np.ndarray) -> np.ndarray:
+        """Scalar-quantize a vector to int8 after unit normalization
+
+        Components of a unit vector lie in [-1, 1], so rounding at a
+        127 scale uses the full int8 range; Atlas runs int8 dot
+        products during ANN search and dequantizes float32 queries
+        itself.
+        """
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector = vector / norm
+        return np.clip(np.round(vector * 127.0), -128, 127).astype(np.int8)
+
+    def _pack_embedding(self, embedding) -> Binary:
+        """Pack an embedding for storage (float32, or int8 when enabled)"""
+        vector = np.asarray(embedding, dtype=np.float32)
+        if self.int8_embeddings:
+            return Binary.from_vector(
+                self._quantize_int8(vector), BinaryVectorDtype.INT8
+            )
+        return Binary.from_vector(vector, BinaryVectorDtype.FLOAT32)
+
+    def _sections_for(self, document_type: str) -> frozenset:
+        """Section-header set for a document type"""
+        if document_type == "drug":
+            return self.drug_sections
+        return self.syndrome_sections
+
     def chunk_markdown_file(self, file_path: str, document_type: str) -> List[Dict]:
         """
         Parse markdown file and chunk by semantic sections
-        
+
         Args:
             file_path: Path to markdown file
             document_type: "drug" or "syndrome"
-            
+
         Returns:
             List of chunk dictionaries
         """
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # Extract document name
-        name_match = re.search(r'(DRUG NAME|SYNDROME):\s*(.+)', content)
-        doc_name = name_match.group(2).strip() if name_match else Path(file_path).stem
-        
-        chunks = []
-        
-        if document_type == "drug":
-            sections = self.drug_sections
-        else:
-            sections = self.syndrome_sections
-        
-        # Add full document as context chunk
-        full_text = f"Document: {doc_name}\n\n{content}"
-        chunks.append({
-            "section": "FULL_DOCUMENT",
-            "text": full_text,
-            "name": doc_name
-        })
-        
-        # Extract each section
-        for section in sections:
-            pattern = rf'{section}:\s*\n(.*?)(?=\n[A-Z\s]+:|$)'
-            match = re.search(pattern, content, re.DOTALL)
-            
-            if match:
-                section_text = match.group(1).strip()
-                
-                # Create chunk with context
-                chunk_text = f"""Document: {doc_name}
-Section: {section}
+        return _chunk_markdown_file(
+            file_path, document_type, self._sections_for(document_type)
+        )
+
 
-{section_text}"""
-                
-                chunks.append({
-                    "section": section,
-                    "text": chunk_text,
-                    "name": doc_name
-                })
-        
-        return chunks
-    
     def create_embedding(self, text: str) -> List[float]:
         """
         Generate embedding using FastEmbed with all-MiniLM-L6-v2
-        
+
         Args:
             text: Input text
-            
+
         Returns:
             Embedding vector
         """
         embedding = list(self.embedding_model.embed([text]))[0]
         return embedding.tolist()
-    
+
     def ingest_directory(self, directory: str, document_type: str):
         """
         Process all markdown files in a directory
-        
+
         Args:
             directory: Path to directory containing .md files
             document_type: "drug" or "syndrome"
         """
         directory_path = Path(directory)
-        md_files = list(directory_path.glob("*.md"))
-        
-        print(f"\n📂 Processing {len(md_files)} {document_type} files from {directory}")
-        
-        all_documents = []
-        
-        for md_file in md_files:
-            print(f"  📄 Chunking: {md_file.name}")
-            chunks = self.chunk_markdown_file(str(md_file), document_type)
-            
-            for chunk in chunks:
-                print(f"    🔹 Embedding section: {chunk['section']}")
-                embedding = self.create_embedding(chunk['text'])
-                
-                document = {
+
+        print(f"\n📂 Processing {document_type} files from {directory}")
+
+        # Pass 1: chunk the files across a process pool — the regex
+        # parsing is pure-Python CPU work and the files are independent.
+        # The glob generator is fed straight to the pool so workers
+        # start chunking before the directory listing is fully
+        # enumerated (and no list of Path objects is materialized).
+        chunker = partial(
+            _chunk_markdown_file,
+            document_type=document_type,
+            sections=self._sections_for(document_type)
+        )
+        all_chunks = []
+        file_count = 0
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+            for chunks in executor.map(
+                chunker, (str(p) for p in directory_path.glob("*.md"))
+            ):
+                file_count += 1
+                if chunks:
+                    print(f"  📄 Chunked: {chunks[0]['file_name']}")
+                all_chunks.extend(chunks)
+
+        print(f"  {file_count} files chunked")
+
+        if not all_chunks:
+            # Nothing to embed — also avoids mapping a zero-length
+            # spill buffer, which mmap rejects
+            print("⚠️  No chunks extracted — nothing to ingest")
+            return 0
+
+        # Pass 2: content-addressed cache lookup, then smart batching —
+        # chunks already embedded (this run or a previous one) are served
+        # by hash, and the misses are embedded in ascending length order
+        # so each batch pads to similar-length neighbors instead of to
+        # the longest chunk in the corpus
+        # Character length tracks token length closely enough for batch
+        # packing, without a tokenizer pass (FastEmbed tokenizes
+        # internally with the model's own vocabulary anyway)
+        texts = [chunk['text'] for chunk in all_chunks]
+        lengths = [len(text) for text in texts]
+        digests = [
+            hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+            for text in texts
+        ]
+
+        # Disk-backed spill buffer for the embedding matrix: peak RAM
+        # stays O(batch) regardless of corpus size, and pass 3 reads
+        # rows back through the page cache
+        spill_path = os.path.join(
+            tempfile.gettempdir(), f"care2data_embeddings_{os.getpid()}.f32"
+        )
+        embeddings = np.memmap(
+            spill_path, dtype=np.float32, mode="w+",
+            shape=(len(texts), 384)  # all-MiniLM-L6-v2 dimension
+        )
+        os.makedirs(os.path.dirname(EMBED_CACHE_PATH), exist_ok=True)
+        with shelve.open(EMBED_CACHE_PATH) as disk_cache:
+            miss_indices = []
+            for i, digest in enumerate(digests):
+                vector = self._embedding_cache.get(digest)
+                if vector is None:
+                    vector = disk_cache.get(digest)
+                if vector is not None:
+                    embeddings[i] = vector
+                else:
+                    miss_indices.append(i)
+
+            miss_indices.sort(key=lengths.__getitem__)
+            print(f"\n🔹 Embedding {len(miss_indices)} of {len(texts)} chunks "
+                  f"({len(texts) - len(miss_indices)} cache hits)...")
+            miss_embeddings = self.embedding_model.embed(
+                [texts[i] for i in miss_indices], batch_size=64
+            )
+            for i, embedding in zip(miss_indices, miss_embeddings):
+                # Keep float32 arrays end to end; no 384-PyFloat list
+                # is ever materialized per chunk
+                vector = np.asarray(embedding, dtype=np.float32)
+                embeddings[i] = vector
+                self._embedding_cache[digests[i]] = vector
+                disk_cache[digests[i]] = vector
+
+        # Pass 3: zip embeddings back into documents and flush them in
+        # bounded unordered batches. ordered=False lets the server
+        # parallelize the inserts and keeps one bad document from
+        # aborting the rest.
+        print(f"\n💾 Inserting {len(all_chunks)} chunks into MongoDB...")
+        inserted = 0
+        ops = []
+        pending = []
+        # Flushes go to a small background pool (MongoClient is
+        # thread-safe) so the Atlas round-trip for batch N overlaps
+        # with packing batch N+1; wall time approaches
+        # max(pack_time, insert_time) instead of their sum
+        with ThreadPoolExecutor(max_workers=2) as flusher:
+            for chunk, embedding, length in zip(all_chunks, embeddings, lengths):
+                ops.append(InsertOne({
                     "document_type": document_type,
                     "name": chunk['name'],
                     "section": chunk['section'],
                     "chunk_text": chunk['text'],
-                    "embedding": embedding,
+                    # Packed BSON vector (subtype 9): float32 is 1.5 KB per
+                    # 384-dim embedding instead of ~4 KB of BSON doubles,
+                    # int8 a further 4x smaller when enabled
+                    "embedding": self._pack_embedding(embedding),
                     "metadata": {
-                        "file_name": md_file.name,
-                        "token_count": len(self.tokenizer.encode(chunk['text']))
+                        "file_name": chunk['file_name'],
+                        # ~4 chars per token; the old cl100k_base count was
+                        # the wrong vocabulary for MiniLM anyway
+                        "token_count": length // 4
                     }
-                }
-                
-                all_documents.append(document)
-        
-        # Insert into MongoDB
-        if all_documents:
-            print(f"\n💾 Inserting {len(all_documents)} chunks into MongoDB...")
-            self.collection.insert_many(all_documents)
+                }))
+                if len(ops) >= self.BULK_BATCH:
+                    pending.append(flusher.submit(
+                        self.collection.bulk_write, ops, ordered=False
+                    ))
+                    inserted += len(ops)
+                    ops = []
+
+            if ops:
+                pending.append(flusher.submit(
+                    self.collection.bulk_write, ops, ordered=False
+                ))
+                inserted += len(ops)
+
+            wait(pending)
+
+        # Surface any insert failure from the background flushes
+        for future in pending:
+            future.result()
+
+        # Release the spill buffer now that every row has been packed
+        del embeddings
+        try:
+            os.unlink(spill_path)
+        except OSError:
+            pass
+
+        if inserted:
             print("✅ Insertion complete!")
-        
-        return len(all_documents)
+
+        return inserted
+
+    def drop_vector_index(self):
+        """
+        Drop the search index before bulk ingest so inserts don't each
+        pay an HNSW update; call build_vector_index once all
+        directories are ingested
+        """
+        try:
+            self.collection.drop_search_index(self.VECTOR_INDEX_NAME)
+            print(f"🔻 Dropped {self.VECTOR_INDEX_NAME} for bulk ingest")
+        except Exception:
+            # Index absent, or the server doesn't support search-index
+            # commands (local/non-Atlas MongoDB) — nothing to drop
+            pass
+
+    def build_vector_index(self):
+        """
+        Kick off one bulk index build over the fully inserted data
+        """
+        try:
+            self.collection.create_search_index(model=SearchIndexModel(
+                definition=self._index_definition(),
+                name=self.VECTOR_INDEX_NAME,
+                type="vectorSearch"
+            ))
+            print(f"🔍 Building {self.VECTOR_INDEX_NAME} search index")
+        except Exception as e:
+            # Non-Atlas deployments lack search-index commands; fall
+            # back to the printed definition for manual creation
+            print(f"⚠️  Could not create search index automatically ({e})")
+            self.create_vector_index()
     
+    VECTOR_INDEX_NAME = "vector_index"
+
+    @staticmethod
+    def _index_definition() -> Dict:
+        """Field definition for the Atlas Vector Search index"""
+        return {
+            "fields": [
+                {
+                    "type": "vector",
+                    "path": "embedding",
+                    "numDimensions": 384,  # all-MiniLM-L6-v2
+                    "similarity": "cosine",
+                    "quantization": "scalar"  # int8 dot products in ANN search
+                },
+                {
+                    "type": "filter",
+                    "path": "document_type"
+                },
+                {
+                    "type": "filter",
+                    "path": "name"
+                }
+            ]
+        }
+
     def create_vector_index(self):
         """
-        Create MongoDB Atlas Vector Search index
-        
-        Note: This generates the JSON definition. You must create the index
-        in Atlas UI or via Atlas CLI.
+        Print the MongoDB Atlas Vector Search index definition
+
+        Note: The ingestion pipeline normally builds the index itself
+        (see build_vector_index); this JSON is for creating it manually
+        in the Atlas UI or via Atlas CLI when that is unavailable.
         """
         index_definition = {
-            "name": "vector_index",
+            "name": self.VECTOR_INDEX_NAME,
             "type": "vectorSearch",
-            "definition": {
-                "fields": [
-                    {
-                        "type": "vector",
-                        "path": "embedding",
-                        "numDimensions": 384,  # all-MiniLM-L6-v2
-                        "similarity": "cosine"
-                    },
-                    {
-                        "type": "filter",
-                        "path": "document_type"
-                    },
-                    {
-                        "type": "filter",
-                        "path": "name"
-                    }
-                ]
-            }
+            "definition": self._index_definition()
         }
-        
+
         print("\n🔍 Vector Search Index Definition:")
         print("=" * 60)
         import json
         print(json.dumps(index_definition, indent=2))
         print("=" * 60)
-        print("\n⚠️  Create this index in MongoDB Atlas UI:")
+        print("\n⚠️  To create this index manually in MongoDB Atlas UI:")
         print("   1. Go to Atlas Cluster → Search → Create Search Index")
         print("   2. Choose 'JSON Editor'")
         print("   3. Paste the definition above")
@@ -274,17 +591,21 @@ def main():
     if reset == 'y':
         vectorizer.reset_collection()
     
+    # Drop the search index once for the whole run so neither pass
+    # pays per-insert HNSW updates
+    vectorizer.drop_vector_index()
+
     # Ingest drug knowledge
     drug_count = vectorizer.ingest_directory("drug_knowledge", "drug")
-    
+
     # Ingest syndrome knowledge
     syndrome_count = vectorizer.ingest_directory("syndrome_knowledge", "syndrome")
-    
+
     # Show statistics
     vectorizer.get_stats()
-    
-    # Generate vector index definition
-    vectorizer.create_vector_index()
+
+    # Rebuild the vector index over everything ingested above
+    vectorizer.build_vector_index()
     
     print("\n✅ Vector ingestion complete!")
     print(f"   Total documents: {drug_count + syndrome_count}")